@@ -12,8 +12,7 @@ def register_user():
     Register a new user in the system.
 
     - Prompts for username and password.
-    - Checks if the username already exists.
-    - If not, adds the new user to the database.
+    - Adds the new user to the database unless the username already exists.
     """
     print("\n📝 === REGISTER ===")
 
@@ -26,14 +25,15 @@ def register_user():
         print("❌ Username and password cannot be empty.")
         return None
 
-    # Check if the username already exists in the database
-    existing_user = get_user(username, password=None)
-    if existing_user:
+    # Register the new user (False if the username exists, None on a database error)
+    user_id = add_user(username, password)
+    if user_id is None:
+        print("❌ Registration failed. Please try again.")
+        return None
+    if user_id is False:
         print("❌ Username already exists. Try a different one.")
         return None
 
-    # Register the new user
-    add_user(username, password)
     print("✅ Registration successful!")
     return True
 
@@ -12,20 +12,55 @@ Users can:
 """
 
 import os
-from database import get_cards_by_slot, add_card, update_card, delete_card
+import sys
+from database import get_cards_by_slot, get_slot_counts, add_card, update_card, delete_card
 from review import review_cards
 
 
 # ==============================
 #  Utility Functions
 # ==============================
+def _enable_ansi():
+    """
+    Make sure the terminal understands ANSI escape sequences.
+
+    Always true on macOS/Linux. On Windows, virtual terminal processing
+    is switched on for the console; legacy consoles that refuse it fall
+    back to 'cls'.
+
+    Returns:
+        bool: True if ANSI sequences can be used to clear the screen.
+    """
+    if os.name != "nt":
+        return True
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_ulong()
+        if not kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            return False
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(handle, mode.value | 0x0004))
+    except (AttributeError, OSError):
+        return False
+
+
+_ANSI_SUPPORTED = _enable_ansi()
+
+
 def clear_screen():
     """
     Clear the terminal screen for better readability.
 
-    Works on both Windows (cls) and macOS/Linux (clear).
+    Writes the ANSI clear sequence directly instead of spawning a shell;
+    only legacy Windows consoles fall back to 'cls'.
     """
-    os.system("cls" if os.name == "nt" else "clear")
+    if _ANSI_SUPPORTED:
+        sys.stdout.write("\x1b[2J\x1b[H")
+        sys.stdout.flush()
+    else:
+        os.system("cls")
 
 
 # ==============================
@@ -44,12 +79,14 @@ def dashboard_menu(user_id):
     """
     while True:
         clear_screen()
-        print("\n=== DASHBOARD ===")
-        print("1) Show Box")
-        print("2) Add Card")
-        print("3) Modify Card")
-        print("4) Review Cards")
-        print("5) Logout")
+        print(
+            "\n=== DASHBOARD ===\n"
+            "1) Show Box\n"
+            "2) Add Card\n"
+            "3) Modify Card\n"
+            "4) Review Cards\n"
+            "5) Logout"
+        )
 
         choice = input("\nEnter your choice: ").strip()
 
@@ -79,10 +116,10 @@ def show_box(user_id):
         user_id (int): The ID of the logged-in user.
     """
     clear_screen()
-    print("\n=== YOUR LEITNER BOX ===")
-    for slot in range(1, 7):
-        cards = get_cards_by_slot(user_id, slot) or []
-        print(f"Slot {slot} → {len(cards)} Cards")
+    counts = get_slot_counts(user_id) or {}
+    lines = ["\n=== YOUR LEITNER BOX ==="]
+    lines += [f"Slot {slot} → {counts.get(slot, 0)} Cards" for slot in range(1, 7)]
+    print("\n".join(lines))
     input("\nPress Enter to return to dashboard...")
 
 
@@ -145,11 +182,12 @@ def modify_card_menu(user_id):
         print("No cards found in this slot.")
         input("Press Enter to return...")
         return
+    cards_by_id = {card[0]: card for card in cards}
 
     # Show all cards
-    print(f"\n=== SLOT {slot} CARDS ===")
-    for card_id, question, answer in cards:
-        print(f"ID: {card_id} | Q: {question} | A: {answer}")
+    lines = [f"\n=== SLOT {slot} CARDS ==="]
+    lines += [f"ID: {card_id} | Q: {question} | A: {answer}" for card_id, question, answer in cards]
+    print("\n".join(lines))
 
     # Choose which card to modify
     try:
@@ -160,7 +198,7 @@ def modify_card_menu(user_id):
         return
 
     # Validate card ID exists
-    if card_id not in [card[0] for card in cards]:
+    if card_id not in cards_by_id:
         print("Card ID not found.")
         input("Press Enter to return...")
         return
@@ -179,7 +217,7 @@ def modify_card_menu(user_id):
         new_a = input("Enter new answer (leave blank to keep current): ").strip()
 
         # Keep current values if user leaves input blank
-        existing = next((c for c in cards if c[0] == card_id), None)
+        existing = cards_by_id[card_id]
         final_q = new_q if new_q else existing[1]
         final_a = new_a if new_a else existing[2]
 
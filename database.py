@@ -5,27 +5,78 @@
 # and review scheduling logic.
 
 import psycopg2
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from collections import OrderedDict
+from contextlib import contextmanager
 from functools import wraps
+from weakref import WeakSet
+import hashlib
 import bcrypt
 
 
 # ==============================
-#  Database Connection
+#  Database Connection Pool
 # ==============================
-def get_connection():
+# Connections are opened once at import time and reused by every
+# decorated function, instead of paying a full connect handshake per query.
+_POOL = ThreadedConnectionPool(
+    minconn=1,
+    maxconn=10,
+    dbname="leitner_db",
+    user="postgres",
+    password="1234",
+    host="localhost",
+    port="5432"
+)
+
+
+# bcrypt cost factor; 10 keeps login responsive for an interactive CLI.
+BCRYPT_ROUNDS = 10
+
+
+# Review interval (in days) for each slot, indexed by slot number (1–6).
+# Used both for scheduling and for the overdue penalty in get_due_cards.
+INTERVALS = (0, 1, 3, 7, 14, 30, 60)
+
+
+# ==============================
+#  Prepared Statements
+# ==============================
+# Hot queries are prepared once per pooled connection so PostgreSQL can
+# reuse the parsed plan instead of re-planning on every call.
+_PREPARED_STATEMENTS = (
+    "PREPARE get_user_p (text) AS "
+    "SELECT id, username, password FROM users WHERE username=$1",
+    "PREPARE get_cards_by_slot_p (integer, integer) AS "
+    "SELECT id, question, answer FROM cards WHERE user_id=$1 AND slot=$2",
+)
+# Weak references, so connections closed by the pool are dropped from it
+_prepared_connections = WeakSet()
+
+
+def _prepare_connection(conn):
     """
-    Establish a connection to the PostgreSQL database.
+    Prepare the hot statements on a pooled connection the first time it is used.
 
-    Returns:
-        psycopg2.connection: Active connection object.
-    """
-    return psycopg2.connect(
-        dbname="leitner_db",
-        user="postgres",
-        password="1234",
-        host="localhost",
-        port="5432"
-    )
+    Args:
+        conn (psycopg2.connection): Connection borrowed from the pool.
+    """
+    if conn in _prepared_connections:
+        return
+    try:
+        with conn:
+            with conn.cursor() as cursor:
+                # PREPARE survives a rollback, so clear any statements left
+                # behind by an earlier, partially failed attempt
+                cursor.execute("DEALLOCATE ALL")
+                for statement in _PREPARED_STATEMENTS:
+                    cursor.execute(statement)
+    except psycopg2.Error:
+        # Tables do not exist yet (first run, before create_tables);
+        # try again the next time this connection is borrowed.
+        return
+    _prepared_connections.add(conn)
 
 
 # ==============================
@@ -37,39 +88,137 @@ def db_connection(func):
     and cleanup for each function call.
 
     Ensures that:
-    - The connection opens and closes safely.
+    - A pooled connection is borrowed and always returned to the pool.
     - Transactions are automatically committed.
     - Errors are caught and printed.
+
+    Passing session=<connection from db_session()> runs the function on
+    that connection instead; commit and error handling are then left to
+    the session.
     """
     @wraps(func)
-    def wrapper(*args, **kwargs):
-        conn = get_connection()
+    def wrapper(*args, session=None, **kwargs):
+        if session is not None:
+            with session.cursor() as cursor:
+                return func(cursor, *args, **kwargs)
+
+        conn = _POOL.getconn()
         try:
+            _prepare_connection(conn)
             with conn:
                 with conn.cursor() as cursor:
                     return func(cursor, *args, **kwargs)
         except Exception as e:
             print(f"DATABASE ERROR: {e}")
         finally:
-            conn.close()
+            _POOL.putconn(conn)
     return wrapper
 
 
+def db_cursor_stream(itersize=50):
+    """
+    Decorator for queries whose rows should be streamed instead of fetched at once.
+
+    The decorated function runs its query on a named (server-side) cursor
+    and the decorator yields the rows, pulling them from PostgreSQL
+    'itersize' at a time. The pooled connection is returned once the rows
+    are exhausted or the generator is closed. Like db_connection, it
+    accepts session=<connection from db_session()>.
+
+    Args:
+        itersize (int): Number of rows fetched per network round trip.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, session=None, **kwargs):
+            cursor_name = f"{func.__name__}_cursor"
+            if session is not None:
+                with session.cursor(name=cursor_name) as cursor:
+                    cursor.itersize = itersize
+                    func(cursor, *args, **kwargs)
+                    yield from cursor
+                return
+
+            conn = _POOL.getconn()
+            try:
+                _prepare_connection(conn)
+                with conn:
+                    with conn.cursor(name=cursor_name) as cursor:
+                        cursor.itersize = itersize
+                        func(cursor, *args, **kwargs)
+                        yield from cursor
+            except Exception as e:
+                print(f"DATABASE ERROR: {e}")
+            finally:
+                _POOL.putconn(conn)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def db_session():
+    """
+    Borrow one pooled connection for a group of related calls.
+
+    Decorated functions called with session=<the yielded connection> share
+    this connection and a single transaction. It is committed when the
+    block exits normally or is interrupted with Ctrl+C, and rolled back on
+    any other error. Database errors are caught and printed; other
+    exceptions propagate.
+
+    Yields:
+        psycopg2.connection: The borrowed connection.
+    """
+    conn = _POOL.getconn()
+    try:
+        _prepare_connection(conn)
+        try:
+            yield conn
+        except KeyboardInterrupt:
+            conn.commit()  # keep the work saved before the interruption
+            raise
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    except psycopg2.Error as e:
+        print(f"DATABASE ERROR: {e}")
+    finally:
+        _POOL.putconn(conn)
+
+
 # ==============================
 #  Table Creation
 # ==============================
 @db_connection
 def create_tables(cursor):
     """
-    Create the required tables: 'users' and 'cards' if they do not exist.
+    Create the required tables: 'users' and 'cards', plus their indexes,
+    if they do not exist.
     """
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id SERIAL PRIMARY KEY,
             username VARCHAR(100) UNIQUE NOT NULL,
-            password TEXT NOT NULL
+            password BYTEA NOT NULL
         );
     """)
+    # Databases created before hashes were stored as bytes have a TEXT column
+    cursor.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema()
+        AND table_name = 'users' AND column_name = 'password';
+    """)
+    column = cursor.fetchone()
+    if column and column[0] != "bytea":
+        cursor.execute("""
+            ALTER TABLE users
+            ALTER COLUMN password TYPE BYTEA USING convert_to(password, 'UTF8');
+        """)
+        # Statements prepared on this connection still expect a TEXT
+        # password; drop them so they are prepared again on next checkout
+        cursor.execute("DEALLOCATE ALL")
+        _prepared_connections.discard(cursor.connection)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS cards (
             id SERIAL PRIMARY KEY,
@@ -80,6 +229,14 @@ def create_tables(cursor):
             last_review DATE DEFAULT CURRENT_DATE
         );
     """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cards_user_slot
+        ON cards (user_id, slot);
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_cards_user_review
+        ON cards (user_id, last_review);
+    """)
 
 
 # ==============================
@@ -90,38 +247,75 @@ def add_user(cursor, username, password):
     """
     Add a new user with a securely hashed password.
 
+    The username check and the insert happen in a single statement, so
+    callers don't need to look the user up first.
+
     Args:
         username (str): The chosen username.
         password (str): The user's plaintext password (to be hashed).
+
+    Returns:
+        int or bool: The new user's ID, or False if the username is taken.
+        (None is returned by db_connection if a database error occurred.)
     """
-    hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
+    hashed_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
     cursor.execute(
-        "INSERT INTO users (username, password) VALUES (%s, %s)",
-        (username, hashed_pw.decode())
+        """
+        INSERT INTO users (username, password) VALUES (%s, %s)
+        ON CONFLICT (username) DO NOTHING
+        RETURNING id;
+        """,
+        (username, hashed_pw)
     )
+    row = cursor.fetchone()
+    if row is None:
+        return False
+    _LOGIN_CACHE.clear()
+    return row[0]
 
 
-@db_connection
-def get_user(cursor, username, password=None):
+# Successful logins keyed by (username, sha256(password)), so logging in
+# again during the same session skips the deliberately slow bcrypt check.
+_LOGIN_CACHE = OrderedDict()
+_LOGIN_CACHE_SIZE = 128
+
+
+def get_user(username, password):
     """
-    Retrieve user information for login or registration validation.
+    Retrieve user information for login.
 
     Args:
         username (str): The username to look up.
-        password (str, optional): Plaintext password for login authentication.
+        password (str): Plaintext password for login authentication.
 
     Returns:
-        tuple or None: User record if found (and password matches), else None.
-    """
-    if password is None:
-        cursor.execute("SELECT id, username FROM users WHERE username=%s", (username,))
-    else:
-        cursor.execute("SELECT id, username, password FROM users WHERE username=%s", (username,))
-        user = cursor.fetchone()
-        if user and bcrypt.checkpw(password.encode(), user[2].encode()):
-            return user
+        tuple or None: User record if found and the password matches, else None.
+    """
+    key = (username, hashlib.sha256(password.encode()).hexdigest())
+    user = _LOGIN_CACHE.get(key)
+    if user is not None:
+        _LOGIN_CACHE.move_to_end(key)
+        return user
+
+    user = _authenticate_user(username, password)
+    if user:
+        _LOGIN_CACHE[key] = user
+        if len(_LOGIN_CACHE) > _LOGIN_CACHE_SIZE:
+            _LOGIN_CACHE.popitem(last=False)
+    return user
+
+
+@db_connection
+def _authenticate_user(cursor, username, password):
+    """Look up a user and verify the plaintext password with bcrypt."""
+    cursor.execute("EXECUTE get_user_p (%s)", (username,))
+    user = cursor.fetchone()
+    if not user:
         return None
-    return cursor.fetchone()
+    # BYTEA comes back as a memoryview
+    if bcrypt.checkpw(password.encode(), bytes(user[2])):
+        return user
+    return None
 
 
 # ==============================
@@ -144,6 +338,25 @@ def add_card(cursor, user_id, question, answer, slot=1):
     )
 
 
+@db_connection
+def add_cards_bulk(cursor, user_id, pairs, slot=1):
+    """
+    Insert many flashcards at once (e.g. for imports) in a single statement.
+
+    Args:
+        user_id (int): The ID of the user who owns the cards.
+        pairs (list[tuple]): (question, answer) pairs to insert.
+        slot (int): Leitner box slot for all new cards (default is 1).
+    """
+    if not pairs:
+        return
+    execute_values(
+        cursor,
+        "INSERT INTO cards (user_id, question, answer, slot) VALUES %s",
+        [(user_id, question, answer, slot) for question, answer in pairs]
+    )
+
+
 @db_connection
 def get_cards_by_slot(cursor, user_id, slot):
     """
@@ -156,11 +369,26 @@ def get_cards_by_slot(cursor, user_id, slot):
     Returns:
         list[tuple]: List of (id, question, answer) tuples.
     """
+    cursor.execute("EXECUTE get_cards_by_slot_p (%s, %s)", (user_id, slot))
+    return cursor.fetchall()
+
+
+@db_connection
+def get_slot_counts(cursor, user_id):
+    """
+    Count the user's cards in each Leitner slot with a single query.
+
+    Args:
+        user_id (int): The user's ID.
+
+    Returns:
+        dict[int, int]: Mapping of slot number to card count (empty slots omitted).
+    """
     cursor.execute(
-        "SELECT id, question, answer FROM cards WHERE user_id=%s AND slot=%s",
-        (user_id, slot)
+        "SELECT slot, COUNT(*) FROM cards WHERE user_id=%s GROUP BY slot",
+        (user_id,)
     )
-    return cursor.fetchall()
+    return dict(cursor.fetchall())
 
 
 @db_connection
@@ -190,55 +418,57 @@ def delete_card(cursor, card_id):
     cursor.execute("DELETE FROM cards WHERE id=%s", (card_id,))
 
 
-@db_connection
-def update_card_slot(cursor, card_id, new_slot):
-    """
-    Move a card to a different Leitner slot.
-
-    Args:
-        card_id (int): The ID of the card.
-        new_slot (int): The updated slot number.
-    """
-    cursor.execute(
-        "UPDATE cards SET slot=%s WHERE id=%s",
-        (new_slot, card_id)
-    )
-
-
 # ==============================
 #  Review System
 # ==============================
-@db_connection
+@db_cursor_stream(itersize=50)
 def get_due_cards(cursor, user_id):
     """
     Retrieve all cards that are due for review (last_review <= today).
 
+    The overdue penalty is computed by PostgreSQL: a card reviewed more than
+    2 days past its slot interval comes back with its slot lowered by one.
+
     Args:
         user_id (int): The user's ID.
 
-    Returns:
-        list[tuple]: Cards that should be reviewed today.
+    Yields:
+        tuple: (id, question, answer, slot, effective_slot, overdue_days)
+        for each card that should be reviewed today.
     """
     cursor.execute("""
-        SELECT id, question, answer, slot, last_review
-        FROM cards
-        WHERE user_id = %s
-        AND last_review <= CURRENT_DATE
+        SELECT id, question, answer, slot,
+               CASE WHEN overdue_days > interval_days + 2 AND slot > 1
+                    THEN slot - 1 ELSE slot END AS effective_slot,
+               overdue_days
+        FROM (
+            SELECT id, question, answer, slot,
+                   CURRENT_DATE - last_review AS overdue_days,
+                   COALESCE((%s::int[])[slot], 1) AS interval_days
+            FROM cards
+            WHERE user_id = %s
+            AND last_review <= CURRENT_DATE
+        ) AS due
         ORDER BY slot;
-    """, (user_id,))
-    return cursor.fetchall()
+    """, (list(INTERVALS[1:]), user_id))
 
 
 @db_connection
-def update_review_date(cursor, card_id, next_date):
+def batch_update_reviews(cursor, updates):
     """
-    Update the review date after a successful or failed review.
+    Apply the results of a review session in a single statement.
 
     Args:
-        card_id (int): The card's ID.
-        next_date (date): The next scheduled review date.
+        updates (list[tuple]): (card_id, new_slot, next_date) for each reviewed card.
     """
-    cursor.execute(
-        "UPDATE cards SET last_review = %s WHERE id = %s;",
-        (next_date, card_id)
+    if not updates:
+        return
+    execute_values(
+        cursor,
+        """
+        UPDATE cards SET slot = data.slot, last_review = data.next_date
+        FROM (VALUES %s) AS data (id, slot, next_date)
+        WHERE cards.id = data.id;
+        """,
+        updates
     )
\ No newline at end of file
@@ -9,20 +9,11 @@ Responsibilities:
 - Navigate user to the dashboard upon successful login
 """
 
-import os
 from auth import register_user, login_user
-from dashboard import dashboard_menu
+from dashboard import dashboard_menu, clear_screen
 from database import create_tables
 
 
-def clear_screen():
-    """
-    Clear the terminal screen.
-    Works for both Windows (cls) and macOS/Linux (clear).
-    """
-    os.system("cls" if os.name == "nt" else "clear")
-
-
 def main_menu():
     """
     Display the main menu and handle user navigation.
@@ -6,59 +6,60 @@
 # - Update card slot and next review date
 # - Penalize cards that are reviewed more than 2 days late
 
-from database import get_due_cards, update_card_slot, update_review_date
+from database import INTERVALS, db_session, get_due_cards, batch_update_reviews
 from datetime import date, timedelta
+from itertools import chain
 
 
 def review_cards(user_id):
     """Main Leitner review loop for the given user."""
-    cards = get_due_cards(user_id)
-    if not cards:
-        print("\n📭 No cards to review today!")
-        return
+    # The whole session runs on one pooled connection and one transaction
+    with db_session() as session:
+        _review_session(user_id, session)
 
-    # Define review intervals for each slot (in days)
-    intervals = {
-        1: 1,
-        2: 3,
-        3: 7,
-        4: 14,
-        5: 30,
-        6: 60
-    }
 
-    print(f"\n🧠 {len(cards)} card(s) due for review today!\n")
+def _review_session(user_id, session):
+    """Review the user's due cards on an open database session."""
+    # Due cards are streamed from the database; peek to see if there are any
+    cards = get_due_cards(user_id, session=session)
+    first_card = next(cards, None)
+    if first_card is None:
+        print("\n📭 No cards to review today!")
+        return
 
-    for card_id, question, answer, slot, last_review in cards:
-        # --- Check for overdue penalty ---
-        overdue_days = (date.today() - last_review).days
-        grace_period = 2  # allowed days past the due date before penalty
+    print("\n🧠 You have cards due for review today!\n")
 
-        # If more than 2 days late, demote one slot (minimum slot = 1)
-        if overdue_days > intervals.get(slot, 1) + grace_period:
-            if slot > 1:
-                new_slot = slot - 1
-                update_card_slot(card_id, new_slot)
-                print(f"⚠️ Card was overdue ({overdue_days} days). Moved back to slot {new_slot}.")
-                slot = new_slot  # update local slot value
+    # Results are collected and written back in one batch at the end
+    updates = []
+    today = date.today()
+    try:
+        for card_id, question, answer, slot, effective_slot, overdue_days in chain([first_card], cards):
+            # --- Overdue penalty (computed by get_due_cards) ---
+            # Cards more than 2 days late come back one slot lower
+            if effective_slot < slot:
+                slot = effective_slot  # saved together with the review result below
+                print(f"⚠️ Card was overdue ({overdue_days} days). Moved back to slot {slot}.")
 
-        # --- Ask the user the question ---
-        print(f"\nQ: {question}")
-        user_answer = input("Your answer: ").strip()
+            # --- Ask the user the question ---
+            print(f"\nQ: {question}")
+            user_answer = input("Your answer: ").strip()
 
-        # --- Evaluate the answer ---
-        if user_answer.lower() == answer.lower():
-            print("✅ Correct!")
-            new_slot = min(slot + 1, 6)  # max slot = 6 (learned)
-        else:
-            print(f"❌ Wrong! Correct answer: {answer}")
-            new_slot = 1  # restart from slot 1
+            # --- Evaluate the answer ---
+            if user_answer.casefold() == answer.casefold():
+                print("✅ Correct!")
+                new_slot = min(slot + 1, 6)  # max slot = 6 (learned)
+            else:
+                print(f"❌ Wrong! Correct answer: {answer}")
+                new_slot = 1  # restart from slot 1
 
-        # --- Schedule the next review date ---
-        next_date = date.today() + timedelta(days=intervals[new_slot])
-        update_card_slot(card_id, new_slot)
-        update_review_date(card_id, next_date)
+            # --- Schedule the next review date ---
+            next_date = today + timedelta(days=INTERVALS[new_slot])
+            updates.append((card_id, new_slot, next_date))
 
-        print(f"🗓️ Card moved to slot {new_slot}. Next review on {next_date}.\n")
+            print(f"🗓️ Card moved to slot {new_slot}. Next review on {next_date}.\n")
+    finally:
+        cards.close()
+        # Save answered cards even if the session is interrupted
+        batch_update_reviews(updates, session=session)
 
     print("🎉 Review session complete!")
\ No newline at end of file